@@ -23,7 +23,23 @@ ctypedef numpy.uint8_t DTYPE8_t
 
 
 
-def uncompress(numpy.ndarray[DTYPE8_t] data, DTYPE_t uncompressed_size):
+def parse_header(const unsigned char[:] data):
+    cdef bint is_little_endian = data[0] == 1
+    cdef unsigned char message_type = data[1]
+    cdef unsigned char compression_mode = data[2]
+    cdef unsigned long long message_size
+
+    if is_little_endian:
+        message_size = data[4] | (data[5] << 8) | (data[6] << 16) | ((<unsigned long long>data[7]) << 24)
+    else:
+        message_size = ((<unsigned long long>data[4]) << 24) | (data[5] << 16) | (data[6] << 8) | data[7]
+
+    message_size += (<unsigned long long>data[3]) << 32
+    return is_little_endian, message_type, compression_mode, message_size
+
+
+
+def uncompress(const unsigned char[::1] data, DTYPE_t uncompressed_size):
     cdef DTYPE_t n, r, i, d, s, p, pp, f
     n, r, s, p, pp = 0, 0, 0, 0, 0
     i, d = 1, 1
@@ -14,11 +14,17 @@
 #  limitations under the License.
 #
 
+import numpy
 import socket
 import struct
+import sys
 
 from qpython import MetaData, CONVERSION_OPTIONS
-from qpython.qtype import QException
+from qpython.qtype import QException, QTABLE, QDICTIONARY, QGENERAL_LIST, \
+    QSYMBOL_LIST, QGUID_LIST, QSTRING, QTIMESTAMP_LIST, QTIME_LIST, \
+    ATOM_SIZE, PY_TYPE
+from qpython.qcollection import qlist, qtable, QTable
+from qpython.qtemporal import array_from_raw_qtemporal
 from qpython.qreader import QReader, QReaderException
 from qpython.qwriter import QWriter, QWriterException
 
@@ -65,6 +71,13 @@ class QConnection(object):
      - `encoding` (`string`) - string encoding for data deserialization
      - `reader_class` (subclass of `QReader`) - data deserializer
      - `writer_class` (subclass of `QWriter`) - data serializer
+     - `rcvbuf` (`integer` or `None`) - socket receive buffer size
+       (``SO_RCVBUF``) in bytes, `None` leaves the OS default; larger values
+       (e.g. 4 MiB) avoid TCP window stalls on bulk responses over high
+       bandwidth-delay links, but may require raising the OS limit
+       (``net.core.rmem_max`` on Linux)
+     - `sndbuf` (`integer` or `None`) - socket send buffer size
+       (``SO_SNDBUF``) in bytes, `None` leaves the OS default
     :Options: 
      - `raw` (`boolean`) - if ``True`` returns raw data chunk instead of parsed 
        data, **Default**: ``False``
@@ -79,11 +92,13 @@ class QConnection(object):
 
     MAX_PROTOCOL_VERSION = 6
 
-    def __init__(self, host, port, username = None, password = None, timeout = None, encoding = 'latin-1', reader_class = None, writer_class = None, **options):
+    def __init__(self, host, port, username = None, password = None, timeout = None, encoding = 'latin-1', reader_class = None, writer_class = None, rcvbuf = None, sndbuf = None, **options):
         self.host = host
         self.port = port
         self.username = username
         self.password = password
+        self.rcvbuf = rcvbuf
+        self.sndbuf = sndbuf
 
         self._connection = None
         self._connection_file = None
@@ -94,6 +109,9 @@ class QConnection(object):
         self._encoding = encoding
 
         self._options = MetaData(**CONVERSION_OPTIONS.union_dict(**options))
+        # merged options for the common case of a call without per-query
+        # options; saves a dict rebuild on every query/receive
+        self._options_cached = self._options.union_dict()
 
         try:
             from qpython._pandas import PandasQReader, PandasQWriter
@@ -152,7 +170,16 @@ class QConnection(object):
         '''Initialises the socket used for communicating with a q service,'''
         try:
             self._connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # buffer sizes have to be set before connect to take effect on
+            # the TCP window scaling negotiated during the handshake
+            if self.rcvbuf:
+                self._connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+            if self.sndbuf:
+                self._connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
             self._connection.connect((self.host, self.port))
+            # disable Nagle's algorithm: handshake and small queries are
+            # latency-bound and must not wait to be coalesced
+            self._connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self._connection.settimeout(self.timeout)
             self._connection_file = self._connection.makefile('b')
         except:
@@ -187,14 +214,14 @@ class QConnection(object):
         '''Performs a IPC protocol handshake.'''
         credentials = (self.username if self.username else '') + ':' + (self.password if self.password else '')
         credentials = credentials.encode(self._encoding)
-        self._connection.send(credentials + bytes([self.MAX_PROTOCOL_VERSION, 0]))
+        self._connection.sendall(credentials + bytes([self.MAX_PROTOCOL_VERSION, 0]))
         response = self._connection.recv(1)
 
         if len(response) != 1:
             self.close()
             self._init_socket()
 
-            self._connection.send(credentials + b'\0')
+            self._connection.sendall(credentials + b'\0')
             response = self._connection.recv(1)
             if len(response) != 1:
                 self.close()
@@ -240,10 +267,12 @@ class QConnection(object):
         if parameters and len(parameters) > 8:
             raise QWriterException('Too many parameters.')
 
+        merged_options = self._options_cached if not options else self._options.union_dict(**options)
+
         if not parameters or len(parameters) == 0:
-            self._writer.write(query, msg_type, **self._options.union_dict(**options))
+            self._writer.write(query, msg_type, **merged_options)
         else:
-            self._writer.write([query] + list(parameters), msg_type, **self._options.union_dict(**options))
+            self._writer.write([query] + list(parameters), msg_type, **merged_options)
 
 
     def sendSync(self, query, *parameters, **options):
@@ -310,6 +339,61 @@ class QConnection(object):
             raise QReaderException('Received message of type: %s where response was expected')
 
 
+    def sendSyncMany(self, queries, **options):
+        '''Performs multiple synchronous queries against a q service and
+        returns a list with parsed data for each query.
+
+        All request frames are written back-to-back before any response is
+        read, so the round-trip latency is paid once for the whole batch
+        instead of once per query. Responses are returned in query order.
+
+        Each element of `queries` is either a q expression or a
+        `(query, parameter, ...)` tuple:
+
+            >>> print(q.sendSyncMany(['til 5', ('{til x}', 10)]))
+            [array([0, 1, 2, 3, 4]...), array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9]...)]
+
+        :Parameters:
+         - `queries` (`iterable`) - queries to be executed, each either a
+           `string` or a `tuple` of query and its parameters
+        :Options:
+         - `raw` (`boolean`) - if ``True`` returns raw data chunk instead of
+           parsed data, **Default**: ``False``
+         - `numpy_temporals` (`boolean`) - if ``False`` temporal vectors are
+           backed by raw q representation (:class:`.QTemporalList`,
+           :class:`.QTemporal`) instances, otherwise are represented as
+           `numpy datetime64`/`timedelta64` arrays and atoms,
+           **Default**: ``False``
+         - `single_char_strings` (`boolean`) - if ``True`` single char Python
+           strings are encoded as q strings instead of chars,
+           **Default**: ``False``
+
+        :returns: list of query results parsed to Python data structures
+
+        :raises: :class:`.QConnectionException`, :class:`.QWriterException`,
+                 :class:`.QReaderException`
+        '''
+        queries = list(queries)
+
+        for query in queries:
+            if isinstance(query, (tuple, list)):
+                self.query(MessageType.SYNC, query[0], *query[1:], **options)
+            else:
+                self.query(MessageType.SYNC, query, **options)
+
+        responses = []
+        for _ in queries:
+            response = self.receive(data_only = False, **options)
+
+            if response.type == MessageType.RESPONSE:
+                responses.append(response.data)
+            else:
+                self._writer.write(QException('nyi: qPython expected response message'), MessageType.ASYNC if response.type == MessageType.ASYNC else MessageType.RESPONSE)
+                raise QReaderException('Received message of type: %s where response was expected')
+
+        return responses
+
+
     def sendAsync(self, query, *parameters, **options):
         '''Performs an asynchronous query and returns **without** retrieving of 
         the response.
@@ -378,9 +462,202 @@ class QConnection(object):
                   parsed message, raw data 
         :raises: :class:`.QReaderException`
         '''
-        result = self._reader.read(**self._options.union_dict(**options))
+        result = self._reader.read(**(self._options_cached if not options else self._options.union_dict(**options)))
         return result.data if data_only else result
 
 
+    def prepare(self, query, *parameters, **options):
+        '''Prepares a repeatable query with a stable result schema.
+
+        Runs the query once, records the result schema and returns a
+        :class:`.PreparedQuery` whose :func:`.PreparedQuery.get` re-executes
+        the query and parses the response with a parser specialized for the
+        recorded schema, skipping the per-object type dispatch:
+
+            >>> trades = q.prepare('select from trade where sym = `AAPL')
+            >>> data = trades.get()
+
+        Specialization applies to table results whose columns are fixed-width
+        vectors or symbols; any other result shape keeps the generic parsing
+        path. If the schema changes between calls, the prepared query falls
+        back to generic parsing for that response.
+
+        :Parameters:
+         - `query` (`string`) - query to be executed
+         - `parameters` (`list` or `None`) - parameters for the query
+
+        :returns: :class:`.PreparedQuery` instance
+
+        :raises: :class:`.QConnectionException`, :class:`.QWriterException`,
+                 :class:`.QReaderException`
+        '''
+        result = self.sendSync(query, *parameters, **options)
+
+        merged_options = self._options.union_dict(**options)
+
+        columns = None
+        if isinstance(result, QTable) and not merged_options.get('pandas') and not merged_options.get('raw'):
+            columns = []
+            for name in result.dtype.names:
+                qtype = abs(result.meta[name])
+                fixed_width = qtype < len(ATOM_SIZE) and ATOM_SIZE[qtype] > 0 \
+                    and qtype not in (QGUID_LIST, QSTRING) and -qtype in PY_TYPE
+
+                if qtype == QSYMBOL_LIST or fixed_width:
+                    columns.append((name.encode(self._encoding), qtype))
+                else:
+                    columns = None
+                    break
+
+        return PreparedQuery(self, query, parameters, columns)
+
+
+    def _sendSync_fast(self, parameters):
+        '''Option-less :func:`.sendSync` used by :func:`.__call__`.
+
+        Inlines query and receive with the pre-merged conversion options,
+        skipping the per-call kwargs merging on the most common entry point.
+        '''
+        if not self._connection:
+            raise QConnectionException('Connection is not established.')
+
+        if len(parameters) > 9:
+            raise QWriterException('Too many parameters.')
+
+        if len(parameters) == 1:
+            self._writer.write(parameters[0], MessageType.SYNC, **self._options_cached)
+        else:
+            self._writer.write(list(parameters), MessageType.SYNC, **self._options_cached)
+
+        response = self._reader.read(**self._options_cached)
+
+        if response.type == MessageType.RESPONSE:
+            return response.data
+        else:
+            self._writer.write(QException('nyi: qPython expected response message'), MessageType.ASYNC if response.type == MessageType.ASYNC else MessageType.RESPONSE)
+            raise QReaderException('Received message of type: %s where response was expected')
+
+
     def __call__(self, *parameters, **options):
+        if parameters and not options:
+            return self._sendSync_fast(parameters)
+
         return self.sendSync(parameters[0], *parameters[1:], **options)
+
+
+
+class PreparedQuery(object):
+    '''Re-executable query specialized for a recorded result schema.
+
+    Instances are created via :func:`.QConnection.prepare`. When the schema
+    could be specialized, responses are parsed column-by-column with
+    precomputed q types straight off the raw message, bypassing the generic
+    type dispatch; otherwise :func:`.get` behaves like plain
+    :func:`.QConnection.sendSync`.
+
+    :Parameters:
+     - `connection` (:class:`.QConnection`) - connection to query over
+     - `query` (`string`) - query to be executed
+     - `parameters` (`tuple`) - parameters for the query
+     - `columns` (`list` of `(name, qtype)` pairs or `None`) - recorded
+       result schema, `None` disables specialization
+    '''
+
+    def __init__(self, connection, query, parameters, columns):
+        self._connection = connection
+        self._query = query
+        self._parameters = parameters
+        self._columns = columns
+
+
+    def get(self, **options):
+        '''Executes the prepared query and returns parsed data.
+
+        :Options: as in :func:`.QConnection.sendSync`; passing any option
+                  forces the generic parsing path for this call
+
+        :returns: query result parsed to Python data structures
+
+        :raises: :class:`.QConnectionException`, :class:`.QWriterException`,
+                 :class:`.QReaderException`
+        '''
+        if self._columns is None or options:
+            return self._connection.sendSync(self._query, *self._parameters, **options)
+
+        raw_data = self._connection.sendSync(self._query, *self._parameters, raw = True)
+        endianness = self._connection._reader._buffer.endianness
+
+        result = self._parse(raw_data, endianness)
+        if result is None:
+            # schema changed since prepare: re-parse generically
+            synthetic = (b'\x01' if endianness == '<' else b'\x00') + b'\x02\x00\x00' \
+                        + struct.pack(endianness + 'i', len(raw_data) + 8) + raw_data
+            reader = self._connection._reader_class(None, encoding = self._connection._encoding)
+            result = reader.read(source = synthetic, **self._connection._options_cached).data
+
+        return result
+
+
+    def _parse(self, data, endianness):
+        '''Parses a raw table message against the recorded schema.
+
+        :returns: :class:`.QTable` or `None` when the message doesn't match
+                  the schema
+        '''
+        unpack_int = struct.Struct(endianness + 'i').unpack_from
+        is_native = endianness == ('<' if sys.byteorder == 'little' else '>')
+        numpy_temporals = self._connection._options.numpy_temporals
+
+        if len(data) < 9 or data[0] != QTABLE or data[2] != QDICTIONARY or data[3] != QSYMBOL_LIST:
+            return None
+
+        if data[4] & 0x80:
+            # long-length (64-bit) vectors are not handled by this parser
+            return None
+
+        if unpack_int(data, 5)[0] != len(self._columns):
+            return None
+
+        position = 9
+        for name, qtype in self._columns:
+            end = data.find(b'\0', position)
+            if end < 0 or data[position : end] != name:
+                return None
+            position = end + 1
+
+        if data[position] != QGENERAL_LIST or data[position + 1] & 0x80 or unpack_int(data, position + 2)[0] != len(self._columns):
+            return None
+        position += 6
+
+        columns = []
+        for name, qtype in self._columns:
+            if data[position] != qtype or data[position + 1] & 0x80:
+                return None
+
+            length = unpack_int(data, position + 2)[0]
+            position += 6
+
+            if qtype == QSYMBOL_LIST:
+                end = position
+                for x in range(length):
+                    end = data.find(b'\0', end)
+                    if end < 0:
+                        return None
+                    end += 1
+
+                symbols = data[position : end - 1].split(b'\0') if length else []
+                column = numpy.array(symbols, dtype = numpy.string_)
+                position = end
+            else:
+                column = numpy.frombuffer(data, dtype = PY_TYPE[-qtype], count = length, offset = position)
+                if not is_native:
+                    column = column.byteswap()
+                position += length * ATOM_SIZE[qtype]
+
+                if qtype >= QTIMESTAMP_LIST and qtype <= QTIME_LIST and numpy_temporals:
+                    column = array_from_raw_qtemporal(column, qtype)
+
+            columns.append(qlist(column, qtype = qtype, adjust_dtype = False))
+
+        names = qlist(numpy.array([name for name, qtype in self._columns], dtype = numpy.string_), qtype = QSYMBOL_LIST, adjust_dtype = False)
+        return qtable(names, columns, qtype = QTABLE)
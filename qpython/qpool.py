@@ -0,0 +1,173 @@
+#
+#  Copyright (c) 2011-2014 Exxeleron GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import queue
+import threading
+
+from qpython.qconnection import QConnection, QConnectionException
+
+
+
+class QConnectionPool(object):
+    '''Thread-safe pool of :class:`.QConnection` instances.
+
+    Keeps opened connections and hands them out for the duration of a single
+    query, so the cost of the TCP connect and IPC handshake is paid once per
+    connection instead of once per query::
+
+        pool = QConnectionPool(host = 'localhost', port = 5000, max_size = 4)
+        with pool.acquire() as q:
+            print(q('til 10'))
+        pool.close()
+
+    Connections are reused most-recently-released first and reopened
+    transparently if they have been closed in the meantime.
+
+    :Parameters:
+     - `host` (`string`) - q service hostname
+     - `port` (`integer`) - q service port
+     - `min_size` (`integer`) - number of connections opened upfront
+     - `max_size` (`integer`) - maximum number of pooled connections
+
+    All other keyword arguments are forwarded to the :class:`.QConnection`
+    constructor.
+    '''
+
+    def __init__(self, host, port, min_size = 0, max_size = 8, **options):
+        if min_size > max_size:
+            raise QConnectionException('min_size cannot exceed max_size')
+
+        self._host = host
+        self._port = port
+        self._options = options
+
+        self._max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._closed = False
+
+        for x in range(min_size):
+            with self._lock:
+                self._size += 1
+            self._idle.put(self._connect())
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+    def _connect(self):
+        connection = QConnection(self._host, self._port, **self._options)
+        try:
+            connection.open()
+        except:
+            with self._lock:
+                self._size -= 1
+            raise
+
+        return connection
+
+
+    def acquire(self, timeout = None):
+        '''Borrows a connection from the pool.
+
+        Returns a context manager yielding an opened :class:`.QConnection`;
+        leaving the ``with`` block returns the connection to the pool. If all
+        connections are busy and the pool is at `max_size`, blocks until one
+        is released.
+
+        :Parameters:
+         - `timeout` (`nonnegative float` or `None`) - seconds to wait for
+           a free connection before giving up
+
+        :raises: :class:`.QConnectionException`
+        '''
+        if self._closed:
+            raise QConnectionException('Connection pool is closed.')
+
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._size < self._max_size
+                if grow:
+                    self._size += 1
+
+            if grow:
+                connection = self._connect()
+            else:
+                try:
+                    connection = self._idle.get(timeout = timeout)
+                except queue.Empty:
+                    raise QConnectionException('No connection available within timeout.')
+
+        if not connection.is_connected():
+            # reopen connections closed while sitting idle in the pool
+            try:
+                connection.open()
+            except:
+                with self._lock:
+                    self._size -= 1
+                raise
+
+        return QConnectionPool._Borrowed(self, connection)
+
+
+    def release(self, connection):
+        '''Returns a borrowed connection to the pool.
+
+        :Parameters:
+         - `connection` (:class:`.QConnection`) - connection obtained via
+           :func:`.acquire`
+        '''
+        if self._closed:
+            connection.close()
+        else:
+            self._idle.put(connection)
+
+
+    def close(self):
+        '''Closes all idle connections and marks the pool as closed.
+
+        Connections borrowed at the time of the call are closed upon release.
+        '''
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+    class _Borrowed(object):
+        '''Context manager returning a borrowed connection to its pool.'''
+
+        def __init__(self, pool, connection):
+            self._pool = pool
+            self._connection = connection
+
+
+        def __enter__(self):
+            return self._connection
+
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            self._pool.release(self._connection)
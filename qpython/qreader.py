@@ -30,6 +30,11 @@ try:
 except:
     from qpython.utils import uncompress
 
+try:
+    from qpython.fastutils import parse_header
+except:
+    from qpython.utils import parse_header
+
 class QReaderException(Exception):
     '''
     Indicates an error raised during data deserialization.
@@ -107,11 +112,16 @@ class QReader(object):
     _reader_map = {}
     parse = Mapper(_reader_map)
 
+    LOOKAHEAD_SIZE = 4096
+    SYMBOL_CACHE_SIZE = 1024
+
 
     def __init__(self, stream, encoding = 'latin-1'):
         self._stream = stream
         self._buffer = QReader.BytesBuffer()
         self._encoding = encoding
+        self._lookahead = b''
+        self._symbol_cache = {}
 
 
     def read(self, source = None, **options):
@@ -153,19 +163,15 @@ class QReader(object):
         :returns: :class:`.QMessage` - read meta information
         '''
         if self._stream:
-            header = self._read_bytes(8)
-            self._buffer.wrap(header)
+            self._fill_lookahead()
+            self._buffer.wrap(self._read_bytes(8))
         else:
             self._buffer.wrap(source)
 
-        self._buffer.endianness = '<' if self._buffer.get_byte() == 1 else '>'
-        self._is_native = self._buffer.endianness == ('<' if sys.byteorder == 'little' else '>')
-        message_type = self._buffer.get_byte()
-        message_compression_mode = self._buffer.get_byte()
-        message_size_ext = self._buffer.get_byte()
+        is_little_endian, message_type, message_compression_mode, message_size = parse_header(self._buffer.raw(8))
 
-        message_size = self._buffer.get_uint()
-        message_size += message_size_ext << 32
+        self._buffer.endianness = '<' if is_little_endian else '>'
+        self._is_native = self._buffer.endianness == ('<' if sys.byteorder == 'little' else '>')
         return QMessage(None, message_type, message_size, message_compression_mode)
 
 
@@ -199,18 +205,18 @@ class QReader(object):
             uncompressed_size = -8 + (self._buffer.get_uint() if compression_mode == 1 else self._buffer.get_long())
             compressed_data = self._read_bytes(message_size - (8+comprHeaderLen)) if self._stream else self._buffer.raw(message_size - (8+comprHeaderLen))
 
-            raw_data = numpy.frombuffer(compressed_data, dtype = numpy.uint8)
             if  uncompressed_size <= 0:
                 raise QReaderException('Error while data decompression.')
 
-            raw_data = uncompress(raw_data, numpy.int64(uncompressed_size))
-            raw_data = numpy.ndarray.tobytes(raw_data)
+            raw_data = uncompress(compressed_data, numpy.int64(uncompressed_size))
             self._buffer.wrap(raw_data)
+            if self._options.raw:
+                raw_data = numpy.ndarray.tobytes(raw_data)
         elif self._stream:
             raw_data = self._read_bytes(message_size - 8)
             self._buffer.wrap(raw_data)
         if not self._stream and self._options.raw:
-            raw_data = self._buffer.raw(message_size - 8)
+            raw_data = bytes(self._buffer.raw(message_size - 8))
 
         return raw_data if self._options.raw else self._read_object()
 
@@ -243,12 +249,22 @@ class QReader(object):
     def _read_string(self, qtype = QSTRING):
         self._buffer.skip()  # ignore attributes
         length = self._buffer.get_int()
-        return self._buffer.raw(length) if length > 0 else b''
+        return bytes(self._buffer.raw(length)) if length > 0 else b''
 
 
     @parse(QSYMBOL)
     def _read_symbol(self, qtype = QSYMBOL):
-        return numpy.string_(self._buffer.get_symbol())
+        raw = self._buffer.get_symbol()
+        symbol = self._symbol_cache.get(raw)
+
+        if symbol is None:
+            symbol = numpy.string_(raw)
+            if len(self._symbol_cache) >= QReader.SYMBOL_CACHE_SIZE:
+                # bounded FIFO eviction so long-lived readers don't grow
+                del self._symbol_cache[next(iter(self._symbol_cache))]
+            self._symbol_cache[raw] = symbol
+
+        return symbol
 
 
     @parse(QCHAR)
@@ -258,7 +274,7 @@ class QReader(object):
 
     @parse(QGUID)
     def _read_guid(self, qtype = QGUID):
-        return uuid.UUID(bytes = self._buffer.raw(16))
+        return uuid.UUID(bytes = bytes(self._buffer.raw(16)))
 
 
     def _read_atom(self, qtype):
@@ -298,7 +314,9 @@ class QReader(object):
             raw = self._buffer.raw(length * ATOM_SIZE[qtype])
             data = numpy.frombuffer(raw, dtype = conversion)
             if not self._is_native:
-                data.byteswap(True)
+                # swap out-of-place: the backing buffer may be read-only
+                # (bytes source) or shared with other readers
+                data = data.byteswap()
 
             if qtype >= QTIMESTAMP_LIST and qtype <= QTIME_LIST and self._options.numpy_temporals:
                 data = array_from_raw_qtemporal(data, qtype)
@@ -378,17 +396,37 @@ class QReader(object):
         return QProjection(parameters)
 
 
+    def _fill_lookahead(self):
+        '''Speculatively pulls a single chunk from the stream ahead of the
+        header read, so that header and a short message body are served by
+        one stream read instead of two.
+        '''
+        if not hasattr(self._stream, 'read1'):
+            return
+
+        while len(self._lookahead) < 8:
+            chunk = self._stream.read1(QReader.LOOKAHEAD_SIZE)
+            if not chunk:
+                raise QReaderException('Error while reading data')
+            self._lookahead += chunk
+
+
     def _read_bytes(self, length):
         if not self._stream:
             raise QReaderException('There is no input data. QReader requires either stream or data chunk')
 
         if length == 0:
             return b''
-        else:
-            data = self._stream.read(length)
 
-        if len(data) == 0:
-            raise QReaderException('Error while reading data')
+        data = self._lookahead[:length]
+        self._lookahead = self._lookahead[length:]
+
+        if len(data) < length:
+            remainder = self._stream.read(length - len(data))
+            if len(remainder) != length - len(data):
+                raise QReaderException('Error while reading data')
+            data += remainder
+
         return data
 
 
@@ -426,8 +464,12 @@ class QReader(object):
             Wraps the data in the buffer.
 
             :Parameters:
-             - `data` - data to be wrapped
+             - `data` (`bytes`, `memoryview` or 1-D `uint8` `numpy.ndarray`) -
+               data to be wrapped
             '''
+            if isinstance(data, numpy.ndarray):
+                data = data.data
+
             self._data = data
             self._position = 0
             self._size = len(data)
@@ -467,6 +509,11 @@ class QReader(object):
             return raw
 
 
+        # compiled struct parsers shared between buffers, keyed by
+        # endianness-qualified format; avoids a format parse per read
+        _struct_cache = {}
+
+
         def get(self, fmt, offset = None):
             '''
             Gets bytes from the buffer according to specified format or `offset`.
@@ -478,8 +525,13 @@ class QReader(object):
             :returns: unpacked bytes
             '''
             fmt = self.endianness + fmt
-            offset = offset if offset else struct.calcsize(fmt)
-            return struct.unpack(fmt, self.raw(offset))[0]
+            parser = QReader.BytesBuffer._struct_cache.get(fmt)
+
+            if parser is None:
+                parser = struct.Struct(fmt)
+                QReader.BytesBuffer._struct_cache[fmt] = parser
+
+            return parser.unpack(self.raw(offset if offset else parser.size))[0]
 
 
         def get_byte(self):
@@ -518,12 +570,25 @@ class QReader(object):
             return self.get('q')
 
 
+        def _as_bytes(self):
+            '''
+            Converts the wrapped data to `bytes`.
+
+            Symbol scanning relies on `bytes.find`, which `memoryview` doesn't
+            provide. The copy is paid once and only for buffers which actually
+            contain symbols.
+            '''
+            if not isinstance(self._data, bytes):
+                self._data = bytes(self._data)
+
+
         def get_symbol(self):
             '''
             Gets a single, ``\\x00`` terminated string from the buffer.
 
             :returns: ``\\x00`` terminated string
             '''
+            self._as_bytes()
             new_position = self._data.find(b'\x00', self._position)
 
             if new_position < 0:
@@ -543,6 +608,7 @@ class QReader(object):
 
             :returns: list of ``\\x00`` terminated string read from the buffer
             '''
+            self._as_bytes()
             c = 0
             new_position = self._position
 
@@ -76,25 +76,104 @@ class QWriter(object):
         :returns: if wraped stream is ``None`` serialized data, 
                   otherwise ``None`` 
         '''
-        self._buffer = BytesIO()
-
         self._options = MetaData(**CONVERSION_OPTIONS.union_dict(**options))
 
-        # header and placeholder for message size
-        self._buffer.write(('%s%s\0\0\0\0\0\0' % (ENDIANNESS, chr(msg_type))).encode(self._encoding))
+        # pre-size the buffer when the payload size is known upfront, so
+        # bulk payloads are serialized without growth reallocations
+        size_hint = self._estimate_size(data)
+        self._buffer = BytesIO(bytes(size_hint)) if size_hint else BytesIO()
 
         self._write(data)
+        self._buffer.truncate(self._buffer.tell())
 
-        # update message size
-        data_size = self._buffer.tell()
-        self._buffer.seek(4)
-        self._buffer.write(struct.pack('i', data_size))
+        # build the header separately so header and payload can be pushed
+        # to the socket via sendmsg without concatenation
+        payload = self._buffer.getbuffer()
+        header = struct.pack('=2s2xi', (ENDIANNESS + chr(msg_type)).encode(self._encoding), 8 + len(payload))
 
         # write data to socket
         if self._stream:
-            self._stream.sendall(self._buffer.getvalue())
+            self._sendall([header, payload])
         else:
-            return self._buffer.getvalue()
+            return header + self._buffer.getvalue()
+
+
+    def _sendall(self, fragments):
+        '''Pushes a list of buffers to the wrapped socket in a single
+        gather-write (``socket.sendmsg``), falling back to ``sendall`` over
+        a concatenated copy where ``sendmsg`` is not available.'''
+        if not hasattr(self._stream, 'sendmsg'):
+            self._stream.sendall(b''.join(fragments))
+            return
+
+        total = sum(len(fragment) for fragment in fragments)
+        sent = self._stream.sendmsg(fragments)
+
+        while sent < total:
+            # short write: drop the fragments already pushed and retry
+            for i, fragment in enumerate(fragments):
+                if sent < len(fragment):
+                    fragments = [memoryview(fragment)[sent:]] + fragments[i + 1:]
+                    break
+                sent -= len(fragment)
+
+            total = sum(len(fragment) for fragment in fragments)
+            sent = self._stream.sendmsg(fragments)
+
+
+    def _estimate_size(self, data):
+        '''Estimates the serialized payload size for `data`.
+
+        q types have deterministic widths, so for atoms and typed lists the
+        exact size is known before serialization starts.
+
+        :returns: `integer` - payload size in bytes or `None` if the size
+                  cannot be determined upfront
+        '''
+        if data is None:
+            return 2
+
+        if isinstance(data, numpy.string_):
+            return 2 + len(data)
+
+        if isinstance(data, (str, bytes)):
+            if not self._options.single_char_strings and len(data) == 1:
+                return 2
+            return 6 + len(data)
+
+        if isinstance(data, (tuple, list)):
+            return self._estimate_generic_list(data)
+
+        if isinstance(data, uuid.UUID):
+            return 17
+
+        if isinstance(data, numpy.ndarray):
+            try:
+                qtype = abs(get_list_qtype(data))
+            except:
+                return None
+
+            if qtype == QGENERAL_LIST:
+                return self._estimate_generic_list(data)
+            elif qtype == QSYMBOL_LIST:
+                return 6 + sum(len(symbol) + 1 for symbol in data)
+
+            atom_size = ATOM_SIZE[qtype] if qtype < len(ATOM_SIZE) else 0
+            return 6 + len(data) * atom_size if atom_size else None
+
+        qtype = Q_TYPE.get(type(data), None)
+        return 1 + ATOM_SIZE[-qtype] if qtype else None
+
+
+    def _estimate_generic_list(self, data):
+        size = 6
+        for element in data:
+            element_size = self._estimate_size(element)
+            if element_size is None:
+                return None
+            size += element_size
+
+        return size
 
 
     def _write(self, data):
@@ -269,16 +348,14 @@ class QWriter(object):
                 data = array_to_raw_qtemporal(data, qtype = qtype)
 
             if qtype == QSYMBOL:
-                for symbol in data:
-                    if symbol:
-                        self._buffer.write(symbol)
-                    self._buffer.write(b'\0')
+                if len(data):
+                    # single write instead of two buffer writes per symbol
+                    self._buffer.write(b'\0'.join(data) + b'\0')
             elif qtype == QGUID:
                 if self._protocol_version < 3:
                     raise QWriterException('kdb+ protocol version violation: Guid not supported pre kdb+ v3.0')
 
-                for guid in data:
-                    self._buffer.write(guid.bytes)
+                self._buffer.write(b''.join(guid.bytes for guid in data))
             else:
                 self._buffer.write(data.tobytes())
 
@@ -17,7 +17,22 @@ import numpy
 
 
 
-def uncompress(data, uncompressed_size):
+def parse_header(data):
+    is_little_endian = data[0] == 1
+    message_type = data[1]
+    compression_mode = data[2]
+
+    if is_little_endian:
+        message_size = data[4] | (data[5] << 8) | (data[6] << 16) | (data[7] << 24)
+    else:
+        message_size = (data[4] << 24) | (data[5] << 16) | (data[6] << 8) | data[7]
+
+    message_size += data[3] << 32
+    return is_little_endian, message_type, compression_mode, message_size
+
+
+
+def _uncompress(data, uncompressed_size):
     _0 = numpy.int64(0)
     _1 = numpy.int64(1)
     _2 = numpy.int64(2)
@@ -71,3 +86,20 @@ def uncompress(data, uncompressed_size):
             i += i
 
     return uncompressed
+
+
+try:
+    # JIT-compile the decompression loop when numba is available, so users
+    # without the compiled fastutils extension still get native speed
+    from numba import njit
+except ImportError:
+    pass
+else:
+    _uncompress = njit(cache = True)(_uncompress)
+
+
+def uncompress(data, uncompressed_size):
+    if not isinstance(data, numpy.ndarray):
+        data = numpy.frombuffer(data, dtype = numpy.uint8)
+
+    return _uncompress(data, uncompressed_size)
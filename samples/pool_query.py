@@ -0,0 +1,42 @@
+#
+#  Copyright (c) 2011-2014 Exxeleron GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import threading
+
+from qpython.qpool import QConnectionPool
+
+
+def worker(pool, query):
+    # borrow an already opened connection instead of paying the
+    # TCP + IPC handshake for every query
+    with pool.acquire() as q:
+        print('%-20s -> %s' % (query, q(query)))
+
+
+if __name__ == '__main__':
+    # create pool with two connections opened upfront
+    pool = QConnectionPool(host = 'localhost', port = 5000, min_size = 2, max_size = 4)
+
+    threads = [threading.Thread(target = worker, args = (pool, query))
+               for query in ['til 5', '2 + til 5', 'reverse til 5', 'sums til 5']]
+
+    for t in threads:
+        t.start()
+
+    for t in threads:
+        t.join()
+
+    pool.close()
@@ -34,6 +34,11 @@ if __name__ == '__main__':
     data = q.sendSync('{`long$ til x}', 10)
     print('type: %s, numpy.dtype: %s, meta.qtype: %s, data: %s ' % (type(data), data.dtype, data.meta.qtype, data))
 
+    # pipelined query execution via: QConnection.sendSyncMany
+    # all requests are written before any response is read
+    for data in q.sendSyncMany(['til 5', ('{`int$ til x}', 10)]):
+        print('type: %s, numpy.dtype: %s, meta.qtype: %s, data: %s ' % (type(data), data.dtype, data.meta.qtype, data))
+
     # low-level query and read
     q.query(qconnection.MessageType.SYNC, '{`short$ til x}', 10) # sends a SYNC query
     msg = q.receive(data_only=False, raw=False) # retrieve entire message
@@ -0,0 +1,152 @@
+#
+#  Copyright (c) 2011-2014 Exxeleron GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+from qpython import qpool
+from qpython.qconnection import QConnectionException
+
+
+class FakeConnection(object):
+    '''In-process stand-in for QConnection: tracks open/close calls.'''
+
+    fail_open = False
+
+    def __init__(self, host, port, **options):
+        self.open_count = 0
+        self.connected = False
+
+    def open(self):
+        if FakeConnection.fail_open:
+            raise QConnectionException('Connection denied.')
+        self.open_count += 1
+        self.connected = True
+
+    def close(self):
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+
+def _make_pool(**kw):
+    return qpool.QConnectionPool('localhost', 5000, **kw)
+
+
+def _with_fake_connection(test):
+    original = qpool.QConnection
+    qpool.QConnection = FakeConnection
+    FakeConnection.fail_open = False
+    try:
+        test()
+    finally:
+        qpool.QConnection = original
+
+
+def test_pool_grows_to_max_and_times_out():
+    def scenario():
+        pool = _make_pool(min_size = 1, max_size = 2)
+
+        borrowed1 = pool.acquire()
+        borrowed2 = pool.acquire()  # grows on demand
+        q1 = borrowed1.__enter__()
+        q2 = borrowed2.__enter__()
+        assert q1 is not q2
+        assert pool._size == 2
+
+        try:
+            pool.acquire(timeout = 0.05)
+            assert False, 'acquire beyond max_size should time out'
+        except QConnectionException:
+            pass
+
+        borrowed1.__exit__(None, None, None)
+        with pool.acquire(timeout = 0.05) as q3:
+            assert q3 is q1  # most-recently-released first
+
+        borrowed2.__exit__(None, None, None)
+        pool.close()
+
+    _with_fake_connection(scenario)
+
+
+def test_pool_reopens_connection_closed_while_idle():
+    def scenario():
+        pool = _make_pool(min_size = 1, max_size = 1)
+
+        with pool.acquire() as q:
+            first = q
+        first.close()
+
+        with pool.acquire() as q:
+            assert q is first
+            assert q.is_connected()
+            assert q.open_count == 2
+
+        pool.close()
+
+    _with_fake_connection(scenario)
+
+
+def test_pool_reopen_failure_releases_capacity():
+    def scenario():
+        pool = _make_pool(min_size = 1, max_size = 1)
+
+        with pool.acquire() as q:
+            pass
+        q.close()
+
+        FakeConnection.fail_open = True
+        try:
+            pool.acquire()
+            assert False, 'acquire should propagate the reopen failure'
+        except QConnectionException:
+            pass
+        assert pool._size == 0  # broken connection no longer counted
+
+        FakeConnection.fail_open = False
+        with pool.acquire(timeout = 0.05) as q:  # capacity is free again
+            assert q.is_connected()
+
+        pool.close()
+
+    _with_fake_connection(scenario)
+
+
+def test_pool_close_while_borrowed():
+    def scenario():
+        pool = _make_pool(min_size = 1, max_size = 1)
+
+        borrowed = pool.acquire()
+        q = borrowed.__enter__()
+
+        pool.close()
+        assert q.is_connected()  # borrower keeps the connection
+
+        borrowed.__exit__(None, None, None)
+        assert not q.is_connected()  # closed upon release
+
+        try:
+            pool.acquire()
+            assert False, 'closed pool should refuse acquire'
+        except QConnectionException:
+            pass
+
+    _with_fake_connection(scenario)
+
+
+test_pool_grows_to_max_and_times_out()
+test_pool_reopens_connection_closed_while_idle()
+test_pool_reopen_failure_releases_capacity()
+test_pool_close_while_borrowed()
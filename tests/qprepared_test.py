@@ -0,0 +1,118 @@
+#
+#  Copyright (c) 2011-2014 Exxeleron GmbH
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import numpy
+
+from qpython.qconnection import QConnection
+from qpython.qreader import QReader
+from qpython.qwriter import QWriter
+from qpython.qcollection import qlist, qtable
+from qpython.qtype import QException, QSYMBOL_LIST, QLONG_LIST, QDOUBLE_LIST, QDATE_LIST
+
+
+class StubConnection(QConnection):
+    '''QConnection serving pre-serialized response messages instead of a socket.'''
+
+    def __init__(self, responses):
+        super(StubConnection, self).__init__('localhost', 5000, reader_class = QReader, writer_class = QWriter)
+        self._responses = list(responses)
+        self._reader = QReader(None)
+        self._reader._buffer.endianness = '<'
+
+    def sendSync(self, query, *parameters, **options):
+        message = self._responses.pop(0)
+        if options.get('raw'):
+            return message[8:]
+        return QReader(None).read(source = message).data
+
+
+def serialize(data):
+    return QWriter(None, 3).write(data, 2)
+
+
+def sample_table():
+    return qtable(qlist(numpy.array(['sym', 'size', 'price', 'date']), qtype = QSYMBOL_LIST),
+                  [qlist(numpy.array(['AAPL', 'MSFT', 'IBM']), qtype = QSYMBOL_LIST),
+                   qlist(numpy.array([100, 200, 300], dtype = numpy.int64), qtype = QLONG_LIST),
+                   qlist(numpy.array([1.5, 2.5, 3.5]), qtype = QDOUBLE_LIST),
+                   qlist(numpy.array([5000, 5001, 5002], dtype = numpy.int32), qtype = QDATE_LIST)])
+
+
+def test_prepared_parse_matches_generic():
+    message = serialize(sample_table())
+    q = StubConnection([message, message])
+
+    prepared = q.prepare('query')
+    assert prepared._columns is not None  # schema was specialized
+    assert prepared._parse(message[8:], '<') is not None
+
+    result = prepared.get()
+    generic = QReader(None).read(source = message).data
+
+    assert result.dtype == generic.dtype
+    assert result.meta.as_dict() == generic.meta.as_dict()
+    for name in generic.dtype.names:
+        assert numpy.array_equal(result[name], generic[name])
+
+
+def test_prepared_falls_back_on_schema_change():
+    table = serialize(sample_table())
+    changed = serialize(qlist(numpy.array([1, 2, 3], dtype = numpy.int64), qtype = QLONG_LIST))
+    q = StubConnection([table, changed])
+
+    prepared = q.prepare('query')
+    result = prepared.get()
+
+    assert numpy.array_equal(result, QReader(None).read(source = changed).data)
+
+
+def test_prepared_raises_on_error_response():
+    table = serialize(sample_table())
+    error = serialize(QException('type'))
+    q = StubConnection([table, error])
+
+    prepared = q.prepare('query')
+    try:
+        prepared.get()
+        assert False, 'error response should raise through the fallback'
+    except QException:
+        pass
+
+
+def test_prepared_rejects_long_length_vectors():
+    # single column table so offsets are fixed:
+    #   0 QTABLE, 1 attr, 2 QDICTIONARY, 3 QSYMBOL_LIST, 4 attr, 5..8 count,
+    #   9 'a', 10 \0, 11 QGENERAL_LIST, 12 attr, 13..16 count,
+    #   17 column type, 18 column attr
+    table = qtable(qlist(numpy.array(['a']), qtype = QSYMBOL_LIST),
+                   [qlist(numpy.array([1, 2, 3], dtype = numpy.int64), qtype = QLONG_LIST)])
+    message = serialize(table)
+    q = StubConnection([message])
+
+    prepared = q.prepare('query')
+    body = message[8:]
+    assert prepared._parse(body, '<') is not None
+
+    for attr_offset in (4, 12, 18):
+        mutated = bytearray(body)
+        mutated[attr_offset] |= 0x80
+        assert prepared._parse(bytes(mutated), '<') is None
+
+
+test_prepared_parse_matches_generic()
+test_prepared_falls_back_on_schema_change()
+test_prepared_raises_on_error_response()
+test_prepared_rejects_long_length_vectors()
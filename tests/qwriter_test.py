@@ -383,6 +383,28 @@ def test_write_single_char_string():
             single_char_strings = not single_char_strings
 
 
+def test_sendmsg_short_writes():
+    class ShortWriteSocket(object):
+        '''Stub socket whose sendmsg pushes at most 3 bytes per call.'''
+        def __init__(self):
+            self.received = b''
+
+        def sendmsg(self, fragments):
+            data = b''.join(bytes(fragment) for fragment in fragments)[:3]
+            self.received += data
+            return len(data)
+
+    for obj in (qlist(numpy.array([98, 42, 126], dtype = numpy.int64), qtype = QLONG_LIST),
+                [1, numpy.string_('abc'), b'quick brown fox'],
+                qlist(numpy.array(['quick', 'brown', 'fox']), qtype = QSYMBOL_LIST)):
+        expected = qwriter.QWriter(None, 3).write(obj, 1)
+
+        stream = ShortWriteSocket()
+        qwriter.QWriter(stream, 3).write(obj, 1)
+        assert stream.received == expected, 'short-write reassembly failed: expected: %s actual: %s' % (expected, stream.received)
+
+
 init()
 test_writing()
 test_write_single_char_string()
+test_sendmsg_short_writes()